@@ -1,84 +1,212 @@
 import ctypes
+import dataclasses
 import enum
-import warnings
+import logging
+import mmap
+import queue
+import threading
 
 import numpy as np
 
 from astropy import units as u
 
+logger = logging.getLogger(__name__)
+
 class ASICamera:
     """ZWO ASI Camera class."""
 
     def __init__(self, library_path, camera_index=0):
         self._CDLL = ctypes.CDLL(library_path)
+        for function_name, (argtypes, restype) in _FUNCTION_SIGNATURES.items():
+            function = getattr(self._CDLL, function_name)
+            function.argtypes = argtypes
+            function.restype = restype
+
+        self._camera_property_cache = {}
 
         n_cameras = self._CDLL.ASIGetNumOfConnectedCameras()
         if n_cameras < 1:
             msg = "No ASI cameras found!"
-            warnings.warn(msg)
+            logger.error(msg)
             raise RuntimeError(msg)
 
         self._camera_index = camera_index
         if n_cameras - self._camera_index < 1:
             msg = "Requested camera index {} but only {} cameras found!".format(self._camera_index,
                                                                                 n_cameras)
-            warnings.warn(msg)
+            logger.error(msg)
             raise RuntimeError(msg)
 
         self._info = self.get_camera_property(self._camera_index)
-        self._camera_ID = self._info['camera_ID']
+        self._camera_ID = self._info.camera_ID
 
         error_code = self._CDLL.ASIOpenCamera(self._camera_ID)
-        if error_code != ErrorCode.SUCCESS:
-            msg = "Couldn't open camera: {}".format(ErrorCode(error_code).name)
-            warnings.warn(msg)
+        if error_code:
+            msg = "Couldn't open camera: {}".format(_error_name(error_code))
+            logger.error(msg)
             raise RuntimeError(msg)
 
         error_code = self._CDLL.ASIInitCamera(self._camera_ID)
-        if error_code != ErrorCode.SUCCESS:
-            msg = "Couldn't init camera: {}".format(ErrorCode(error_code).name)
-            warnings.warn(msg)
+        if error_code:
+            msg = "Couldn't init camera: {}".format(_error_name(error_code))
+            logger.error(msg)
             raise RuntimeError(msg)
 
-        self._image_buffer = self._image_array(width=self._info['max_width'].value,
-                                               height=self._info['max_height'].value,
-                                               image_type="RAW16")
+        # Bind the hot path entry points once, rather than going through _call_function (getattr
+        # on every call).
+        self._ASIGetVideoData = self._CDLL.ASIGetVideoData
+        self._ASIGetControlValue = self._CDLL.ASIGetControlValue
+        self._ASISetControlValue = self._CDLL.ASISetControlValue
+        # Output parameters for ASIGetControlValue, reused by every call
+        self._control_value = ctypes.c_long()
+        self._control_is_auto = ctypes.c_int()
+        self._control_value_refs = (ctypes.byref(self._control_value),
+                                    ctypes.byref(self._control_is_auto))
+
+        # Frame buffers are allocated by start_video_capture.
+        self._frame_buffers = None
+        self._frame_format = None
+        self._video_data_args = None
+        self._free_buffers = None
+        self._filled_buffers = None
+        self._held_buffer = None
+        self._video_thread = None
+        self._video_error = None
+        self._capturing = threading.Event()
+
+        # Control caps are static, so are read on first use and then cached
+        self._control_caps_cache = None
 
     def get_camera_property(self, camera_index):
-        """ Get properties of the camera with given index """
+        """ Get properties of the camera with given index
+
+        Camera properties are static so results are cached, as immutable CameraProperties.
+        """
+        if camera_index in self._camera_property_cache:
+            return self._camera_property_cache[camera_index]
+
         camera_info = CameraInfo()
         error_code = self._CDLL.ASIGetCameraProperty(ctypes.byref(camera_info), camera_index)
-        if error_code != ErrorCode.SUCCESS:
-            msg = "Error getting camera properties: {}".format(ErrorCode(error_code).name)
-            warnings.warn(msg)
+        if error_code:
+            msg = "Error getting camera properties: {}".format(_error_name(error_code))
+            logger.error(msg)
             raise RuntimeError(msg)
 
         pythonic_info = self._parse_info(camera_info)
+        self._camera_property_cache[camera_index] = pythonic_info
         return pythonic_info
 
-    def start_video_capture(self):
-        """ Start video capture mode on camera with given integer ID """
+    def start_video_capture(self, n_buffers=3):
+        """ Start video capture mode on camera with given integer ID
+
+        A background thread reads frames from the camera into a pool of n_buffers preallocated
+        buffers, so the next frame can be acquired while the caller processes the current one. The
+        buffers are sized for the camera's current ROI format.
+        """
+        if self._video_thread is not None and self._video_thread.is_alive():
+            msg = "Cannot start video capture, video capture thread still running"
+            logger.error(msg)
+            raise RuntimeError(msg)
+
+        width, height, binning, image_type = self._get_roi_format()
+        self._allocate_frame_buffers(width=width,
+                                     height=height,
+                                     image_type=image_type,
+                                     n_buffers=n_buffers)
+        self._free_buffers = queue.Queue()
+        for index in range(n_buffers):
+            self._free_buffers.put(index)
+        self._filled_buffers = queue.Queue()
+        self._held_buffer = None
+        self._video_error = None
+
         self._call_function('ASIStartVideoCapture', self._camera_ID)
+        self._capturing.set()
+        self._video_thread = threading.Thread(target=self._video_loop, daemon=True)
+        self._video_thread.start()
 
     def stop_video_capture(self):
         """ Stop video capture mode on camera with given integer ID """
+        self._capturing.clear()
         self._call_function('ASIStopVideoCapture', self._camera_ID)
 
+        video_thread = self._video_thread
+        if video_thread is not None:
+            # Stopping capture makes a pending ASIGetVideoData return, e.g. when in trigger mode
+            video_thread.join(timeout=_VIDEO_THREAD_JOIN_TIMEOUT)
+            if video_thread.is_alive():
+                # Keep hold of it so start_video_capture won't start a second one alongside it
+                logger.warning("Video capture thread still running after stopping video capture")
+            else:
+                self._video_thread = None
+
     def get_video_data(self):
-        """ Get the image data from the next available video frame """
-        try:
-            self._call_function('ASIGetVideoData',
-                                self._camera_ID,
-                                self._image_buffer.ctypes.data_as(ctypes.POINTER(ctypes.c_byte)),
-                                ctypes.c_long(self._image_buffer.nbytes),
-                                ctypes.c_int(-1))
-            # If set timeout to anything but -1 (no timeout) this call times out instantly?
-        except RuntimeError:
-            # Expect some dropped frames during video capture
+        """ Get the image data from the next available video frame
+
+        The returned array is one of the preallocated frame buffers. It is handed back to the
+        background thread for reuse on the next call, so take a copy of any frame that needs to
+        be kept beyond that. Returns None for frames that timed out, or if video capture is not
+        running. Raises RuntimeError if video capture failed, on every call until video capture
+        is restarted.
+        """
+        if self._filled_buffers is None:
             return None
-        else:
-            # Fix scaling and return
-            return np.right_shift(self._image_buffer, 4)
+
+        video_thread = self._video_thread
+        while True:
+            try:
+                index = self._filled_buffers.get(timeout=0.1)
+            except queue.Empty:
+                if video_thread is None or not video_thread.is_alive():
+                    if self._video_error is not None:
+                        raise self._video_error
+                    return None
+            else:
+                break
+
+        if self._held_buffer is not None:
+            self._free_buffers.put(self._held_buffer)
+        self._held_buffer = index
+
+        if index is None:
+            return None
+        return self._frame_buffers[index]
+
+    def _video_loop(self):
+        """ Reads video frames into free frame buffers and queues them for get_video_data
+
+        ctypes releases the GIL for the duration of the SDK call, so other threads can run while
+        this waits for a frame.
+        """
+        # The SDK returns RAW16 data scaled up to 16 bits
+        fix_scaling = self._frame_format[2] == 'RAW16'
+        while self._capturing.is_set():
+            try:
+                index = self._free_buffers.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            error_code = self._ASIGetVideoData(*self._video_data_args[index])
+            if error_code:
+                self._free_buffers.put(index)
+                if not self._capturing.is_set():
+                    # Video capture was stopped while waiting for this frame
+                    break
+                if error_code in _VIDEO_DATA_RETRY_CODES:
+                    # Expect some dropped frames during video capture
+                    self._filled_buffers.put(None)
+                    continue
+                # Anything else is fatal, keep it for get_video_data to raise
+                msg = "Error calling ASIGetVideoData: {}".format(_error_name(error_code))
+                logger.error(msg)
+                self._video_error = RuntimeError(msg)
+                break
+
+            if fix_scaling:
+                # Fix scaling in place
+                frame_buffer = self._frame_buffers[index]
+                np.right_shift(frame_buffer, 4, out=frame_buffer)
+            self._filled_buffers.put(index)
 
     def get_dropped_frames(self):
         """Get the number of dropped frames during video capture."""
@@ -88,81 +216,169 @@ class ASICamera:
                             ctypes.byref(n_dropped_frames))
         return n_dropped_frames
 
+    def get_control_caps(self):
+        """ Get the caps (limits) of each of the camera's controls, keyed by control type
+
+        Control caps are static so are read from the camera once, on the first call, treat the
+        returned dict as read only.
+        """
+        if self._control_caps_cache is None:
+            self._control_caps_cache = self._read_control_caps()
+        return self._control_caps_cache
+
+    def get_control_value(self, control_type):
+        """ Get the current value of a control, as a plain Python value, and its auto status
+
+        Values of controls with units are returned as plain numbers in the units given in
+        control_units, use get_control_value_quantity to get them as astropy Quantities.
+        """
+        error_code = self._ASIGetControlValue(self._camera_ID,
+                                              ControlType[control_type],
+                                              *self._control_value_refs)
+        if error_code:
+            msg = "Error calling ASIGetControlValue: {}".format(_error_name(error_code))
+            logger.error(msg)
+            raise RuntimeError(msg)
+
+        nice_value = self._parse_return_value(self._control_value, control_type)
+        return nice_value, bool(self._control_is_auto.value)
+
+    def get_control_value_quantity(self, control_type):
+        """ Get the current value of a control and its auto status, with units if applicable """
+        value, is_auto = self.get_control_value(control_type)
+        if control_type in control_units:
+            value = value << control_units[control_type]
+        return value, is_auto
+
+    def set_control_value(self, control_type, value, auto=False):
+        """ Set the value of a control, and whether the camera should adjust it automatically
+
+        Values of controls with units can be given as astropy Quantities, or as plain numbers in
+        the units given in control_units.
+        """
+        error_code = self._ASISetControlValue(self._camera_ID,
+                                              ControlType[control_type],
+                                              self._parse_input_value(value, control_type),
+                                              auto)
+        if error_code:
+            msg = "Error calling ASISetControlValue: {}".format(_error_name(error_code))
+            logger.error(msg)
+            raise RuntimeError(msg)
+
+    def _read_control_caps(self):
+        """ Reads the caps of all the camera's controls from the SDK and parses them """
+        n_controls = ctypes.c_int()
+        self._call_function('ASIGetNumOfControls', self._camera_ID, ctypes.byref(n_controls))
+
+        # Read all the caps into one array of structs so they can be parsed in one go. Bind the
+        # function once instead of resolving it by name for every control.
+        caps_array = (ControlCaps * n_controls.value)()
+        get_control_caps = self._CDLL.ASIGetControlCaps
+        for control_index in range(n_controls.value):
+            error_code = get_control_caps(self._camera_ID,
+                                          control_index,
+                                          ctypes.byref(caps_array[control_index]))
+            if error_code:
+                msg = "Error calling ASIGetControlCaps: {}".format(_error_name(error_code))
+                logger.error(msg)
+                raise RuntimeError(msg)
+
+        return self._parse_caps(caps_array)
+
     def _call_function(self, function_name, camera_ID, *args):
-        """ Utility function for calling the SDK functions that return ErrorCode """
+        """ Utility function for calling the SDK functions that return ErrorCode
+
+        Resolves the function by name on every call, so only for use on cold control paths.
+        """
         function = getattr(self._CDLL, function_name)
-        error_code = function(ctypes.c_int(camera_ID), *args)
-        if error_code != ErrorCode.SUCCESS:
-            msg = "Error calling {}: {}".format(function_name, ErrorCode(error_code).name)
-            warnings.warn(msg)
+        error_code = function(camera_ID, *args)
+        # ErrorCode.SUCCESS is 0, so test the plain int rather than comparing with the IntEnum
+        if error_code:
+            msg = "Error calling {}: {}".format(function_name, _error_name(error_code))
+            logger.error(msg)
             raise RuntimeError(msg)
 
     def _parse_info(self, camera_info):
         """ Utility function to parse CameraInfo Structures into something more Pythonic """
-        pythonic_info = {'name': camera_info.name.decode(),
-                         'camera_ID': int(camera_info.camera_ID),
-                         'max_height': camera_info.max_height * u.pixel,
-                         'max_width': camera_info.max_width * u.pixel,
-                         'is_color_camera': bool(camera_info.is_color_camera),
-                         'bayer_pattern': BayerPattern(camera_info.bayer_pattern).name,
-                         'supported_bins': self._parse_bins(camera_info.supported_bins),
-                         'supported_video_format': self._parse_formats(
-                             camera_info.supported_video_format),
-                         'pixel_size': camera_info.pixel_size * u.um,
-                         'has_mechanical_shutter': bool(camera_info.has_mechanical_shutter),
-                         'has_ST4_port': bool(camera_info.has_ST4_port),
-                         'has_cooler': bool(camera_info.has_cooler),
-                         'is_USB3_host': bool(camera_info.is_USB3_host),
-                         'is_USB3_camera': bool(camera_info.is_USB3_camera),
-                         'e_per_adu': camera_info.e_per_adu * u.electron / u.adu,
-                         'bit_depth': camera_info.bit_depth * u.bit,
-                         'is_trigger_camera': bool(camera_info.is_trigger_camera)}
+        pythonic_info = CameraProperties(
+            name=camera_info.name.decode(),
+            camera_ID=int(camera_info.camera_ID),
+            max_height=camera_info.max_height * u.pixel,
+            max_width=camera_info.max_width * u.pixel,
+            is_color_camera=bool(camera_info.is_color_camera),
+            bayer_pattern=_enum_name(BayerPattern, _BAYER_NAMES, camera_info.bayer_pattern),
+            supported_bins=self._parse_bins(camera_info.supported_bins),
+            supported_video_format=self._parse_formats(camera_info.supported_video_format),
+            pixel_size=camera_info.pixel_size * u.um,
+            has_mechanical_shutter=bool(camera_info.has_mechanical_shutter),
+            has_ST4_port=bool(camera_info.has_ST4_port),
+            has_cooler=bool(camera_info.has_cooler),
+            is_USB3_host=bool(camera_info.is_USB3_host),
+            is_USB3_camera=bool(camera_info.is_USB3_camera),
+            e_per_adu=camera_info.e_per_adu * u.electron / u.adu,
+            bit_depth=camera_info.bit_depth * u.bit,
+            is_trigger_camera=bool(camera_info.is_trigger_camera))
         return pythonic_info
 
     def _parse_bins(self, supported_bins):
-        bins = tuple(int(b) for b in supported_bins if b != 0)
-        return bins
+        # View the ctypes array as a numpy array instead of converting element by element
+        bins = np.frombuffer(supported_bins, dtype=np.intc)
+        return tuple(bins[bins != 0].tolist())
 
     def _parse_formats(self, supported_formats):
-        formats = []
-        for supported_format in supported_formats:
-            format = ImgType(supported_format)
-            if format != ImgType.END:
-                formats.append(format.name)
-            else:
-                break
-        return tuple(formats)
-
-    def _parse_caps(self, control_caps):
-        """ Utility function to parse ControlCaps Structures into something more Pythonic """
-        control_type = ControlType(control_caps.control_type).name
-        control_info = {'name': control_caps.name.decode(),
-                        'description': control_caps.description.decode(),
-                        'max_value': self._parse_return_value(control_caps.max_value,
-                                                              control_type),
-                        'min_value': self._parse_return_value(control_caps.min_value,
-                                                              control_type),
-                        'default_value': self._parse_return_value(control_caps.default_value,
-                                                                  control_type),
-                        'is_auto_supported': bool(control_caps.is_auto_supported),
-                        'is_writable': bool(control_caps.is_writable),
-                        'control_type': control_type}
-        return control_info
+        formats = np.frombuffer(supported_formats, dtype=np.intc)
+        ends = np.flatnonzero(formats == ImgType.END)
+        if ends.size:
+            formats = formats[:ends[0]]
+        return tuple(_enum_name(ImgType, _IMG_TYPE_NAMES, format) for format in formats.tolist())
+
+    def _parse_caps(self, caps_array):
+        """ Utility function to parse arrays of ControlCaps Structures into something more Pythonic
+
+        Returns a dict of control info dicts, keyed by control type. Control types this module
+        doesn't know about, e.g. from a newer SDK, are keyed by their integer value.
+        """
+        # View the array of structs as a numpy structured array to extract each field in one go
+        caps = np.frombuffer(caps_array, dtype=_CONTROL_CAPS_DTYPE)
+        control_types = [_CONTROL_TYPE_NAMES[control_type]
+                         if 0 <= control_type < len(_CONTROL_TYPE_NAMES) else control_type
+                         for control_type in caps['control_type'].tolist()]
+        names = [_c_string(name) for name in caps['name'].tolist()]
+        descriptions = [_c_string(description) for description in caps['description'].tolist()]
+        max_values = caps['max_value'].tolist()
+        min_values = caps['min_value'].tolist()
+        default_values = caps['default_value'].tolist()
+        is_auto_supported = caps['is_auto_supported'].astype(bool).tolist()
+        is_writable = caps['is_writable'].astype(bool).tolist()
+
+        control_caps = {}
+        for i, control_type in enumerate(control_types):
+            control_caps[control_type] = {
+                'name': names[i],
+                'description': descriptions[i],
+                'max_value': self._parse_return_value(max_values[i], control_type),
+                'min_value': self._parse_return_value(min_values[i], control_type),
+                'default_value': self._parse_return_value(default_values[i], control_type),
+                'is_auto_supported': is_auto_supported[i],
+                'is_writable': is_writable[i],
+                'control_type': control_type}
+        return control_caps
 
     def _parse_return_value(self, value, control_type):
-        """ Helper function to apply appropiate type conversion and/or units to value """
+        """ Helper function to apply appropiate type conversion and/or scaling to value """
         try:
             int_value = value.value  # If not done already extract Python int from ctypes.c_long
         except AttributeError:
             int_value = value  # If from a ctypes struct value will already be a Python int
 
-        # Apply control type specific units and/or data types
-        if control_type in units_and_scale:
-            nice_value = int_value * units_and_scale[control_type]
+        # Apply control type specific scaling and/or data types. Units are left to the caller, see
+        # get_control_value_quantity.
+        if control_type in control_scales:
+            nice_value = int_value * control_scales[control_type]
         elif control_type in boolean_controls:
             nice_value = bool(int_value)
         elif control_type == 'FLIP':
-            nice_value = FlipStatus(int_value).name
+            nice_value = _enum_name(FlipStatus, _FLIP_NAMES, int_value)
         else:
             nice_value = int_value
 
@@ -171,36 +387,106 @@ class ASICamera:
     def _parse_input_value(self, value, control_type):
         """ Helper function to convert input values to appropriate ctypes.c_long """
 
-        if control_type in units_and_scale:
-            value = get_quantity_value(value, unit=units_and_scale[control_type])
+        if control_type in control_units:
+            # Plain numbers are taken to be in control_units, only Quantities need converting
+            if isinstance(value, u.Quantity):
+                value = value.to_value(control_units[control_type])
+            if control_type in input_scales:
+                value = round(value * input_scales[control_type])
         elif control_type == 'FLIP':
             value = FlipStatus[value]
 
         return ctypes.c_long(int(value))
 
-    def _image_array(self, width, height, image_type):
-        """ Creates a suitable numpy array for storing image data """
+    def _get_roi_format(self):
+        """ Get the width, height, binning and image type of the camera's current ROI format """
+        width = ctypes.c_int()
+        height = ctypes.c_int()
+        binning = ctypes.c_int()
+        image_type = ctypes.c_int()
+        self._call_function('ASIGetROIFormat',
+                            self._camera_ID,
+                            ctypes.byref(width),
+                            ctypes.byref(height),
+                            ctypes.byref(binning),
+                            ctypes.byref(image_type))
+        return (width.value,
+                height.value,
+                binning.value,
+                _enum_name(ImgType, _IMG_TYPE_NAMES, image_type.value))
+
+    def _allocate_frame_buffers(self, width, height, image_type, n_buffers):
+        """ Allocates the video frame buffers, unless ones of the right format already exist """
+        frame_format = (int(width), int(height), image_type, n_buffers)
+        if frame_format == self._frame_format:
+            return
+
+        # The SDK writes each frame straight into ctypes arrays, the numpy arrays returned by
+        # get_video_data are zero copy views of them.
+        width, height = frame_format[:2]
+        dtype, n_channels = _IMAGE_SPECS[image_type]
+        buffer_size = width * height * n_channels * np.dtype(dtype).itemsize
+        raw_buffers = [(ctypes.c_ubyte * buffer_size).from_buffer(self._frame_memory(buffer_size))
+                       for i in range(n_buffers)]
+        self._frame_buffers = [self._image_array(width, height, image_type, buffer=raw_buffer)
+                               for raw_buffer in raw_buffers]
+        self._frame_format = frame_format
+        self._video_data_args = [(self._camera_ID, raw_buffer, buffer_size, -1)
+                                 for raw_buffer in raw_buffers]
+        # If set timeout to anything but -1 (no timeout) ASIGetVideoData times out instantly?
+
+    def _frame_memory(self, size):
+        """ Allocates page aligned memory for a video frame buffer
+
+        Anonymous memory maps are page aligned and zero filled. The SDK copies each frame into the
+        buffer from its own transfer buffers, so this keeps frames aligned for numpy rather than
+        changing how they are transferred from the camera.
+        """
+        return mmap.mmap(-1, size)
+
+    def _image_array(self, width, height, image_type, buffer=None):
+        """ Creates a suitable numpy array for storing image data, optionally a view of buffer """
+        if isinstance(height, u.Quantity):
+            height = height.to_value(u.pixel)
+        if isinstance(width, u.Quantity):
+            width = width.to_value(u.pixel)
         height = int(height)
         width = int(width)
 
-        if image_type in ('RAW8', 'Y8'):
-            image_array = np.empty((height, width), dtype=np.uint8, order='C')
-        elif image_type == 'RAW16':
-            image_array = np.empty((height, width), dtype=np.uint16, order='C')
-        elif image_type == 'RGB24':
-            image_array = np.empty((3, height, width), dtype=np.uint8, order='C')
+        dtype, n_channels = _IMAGE_SPECS[image_type]
+        if n_channels == 1:
+            shape = (height, width)
+        else:
+            shape = (n_channels, height, width)
 
+        image_array = np.ndarray(shape, dtype=dtype, buffer=buffer, order='C')
         return image_array
 
 
-units_and_scale = {'AUTO_TARGET_BRIGHTNESS': u.adu,
-                   'AUTO_MAX_EXP': 1e-6 * u.second,  # Unit is microseconds
-                   'BANDWIDTHOVERLOAD': u.percent,
-                   'COOLER_POWER_PERC': u.percent,
-                   'EXPOSURE': 1e-6 * u.second,  # Unit is microseconds
-                   'OFFSET': u.adu,
-                   'TARGET_TEMP': u.Celsius,
-                   'TEMPERATURE': 0.1 * u.Celsius}  # Unit is 1/10th degree C
+# numpy dtype and number of colour channels of the image data for each image type
+_IMAGE_SPECS = {'RAW8': (np.uint8, 1),
+                'RAW16': (np.uint16, 1),
+                'RGB24': (np.uint8, 3),
+                'Y8': (np.uint8, 1)}
+
+# Scale factors from SDK integer control values to values in control_units
+control_scales = {'AUTO_MAX_EXP': 1e-6,  # SDK unit is microseconds
+                  'EXPOSURE': 1e-6,  # SDK unit is microseconds
+                  'TEMPERATURE': 0.1}  # SDK unit is 1/10th degree C
+
+control_units = {'AUTO_TARGET_BRIGHTNESS': u.adu,
+                 'AUTO_MAX_EXP': u.second,
+                 'BANDWIDTHOVERLOAD': u.percent,
+                 'COOLER_POWER_PERC': u.percent,
+                 'EXPOSURE': u.second,
+                 'OFFSET': u.adu,
+                 'TARGET_TEMP': u.Celsius,
+                 'TEMPERATURE': u.Celsius}
+
+# Scale factors from input values in control_units to SDK integer control values
+input_scales = {'AUTO_MAX_EXP': 1e6,
+                'EXPOSURE': 1e6,
+                'TEMPERATURE': 10}
 
 boolean_controls = ('ANTI_DEW_HEATER',
                     'COOLER_ON',
@@ -223,6 +509,29 @@ class BayerPattern(enum.IntEnum):
     GB = 3
 
 
+# Enum member names indexed by integer value, for parsing SDK values without IntEnum lookups
+_BAYER_NAMES = tuple(pattern.name for pattern in BayerPattern)
+
+
+def _enum_name(enum_class, names, value):
+    """ Name of the enum_class member with given value, using names for non-negative values
+
+    Values outside names fall back to the IntEnum, which handles negative members such as
+    ImgType.END and raises ValueError for values that aren't members.
+    """
+    if 0 <= value < len(names):
+        return names[value]
+    return enum_class(value).name
+
+
+def _c_string(value):
+    """ Decode bytes from a char array field up to the first NUL, as ctypes does
+
+    numpy only strips trailing NULs, the SDK can leave junk after the terminator.
+    """
+    return value.split(b'\0', 1)[0].decode()
+
+
 @enum.unique
 class ImgType(enum.IntEnum):
     """ Supported video format """
@@ -233,6 +542,9 @@ class ImgType(enum.IntEnum):
     END = -1
 
 
+_IMG_TYPE_NAMES = tuple(image_type.name for image_type in ImgType if image_type >= 0)
+
+
 @enum.unique
 class GuideDirection(enum.IntEnum):
     """ Guider direction """
@@ -251,6 +563,9 @@ class FlipStatus(enum.IntEnum):
     BOTH = 3
 
 
+_FLIP_NAMES = tuple(flip_status.name for flip_status in FlipStatus)
+
+
 @enum.unique
 class CameraMode(enum.IntEnum):
     """ Camera status """
@@ -297,6 +612,24 @@ class ErrorCode(enum.IntEnum):
     END = 18
 
 
+# ErrorCode names indexed by integer error code, avoids IntEnum lookups when formatting errors
+_ERROR_NAMES = tuple(error_code.name for error_code in ErrorCode)
+
+
+def _error_name(error_code):
+    """ Name of an SDK error code for error messages, or the plain number if it isn't known """
+    if 0 <= error_code < len(_ERROR_NAMES):
+        return _ERROR_NAMES[error_code]
+    return str(error_code)
+
+
+# Seconds stop_video_capture waits for the video capture thread to finish after stopping capture
+_VIDEO_THREAD_JOIN_TIMEOUT = 1
+
+# ASIGetVideoData error codes that just mean no frame this time, rather than a failure
+_VIDEO_DATA_RETRY_CODES = frozenset((ErrorCode.TIMEOUT.value, ErrorCode.EXPOSURE_IN_PROGRESS.value))
+
+
 class CameraInfo(ctypes.Structure):
     """ Camera info structure """
     _fields_ = [('name', ctypes.c_char * 64),
@@ -319,6 +652,71 @@ class CameraInfo(ctypes.Structure):
                 ('unused', ctypes.c_char * 16)]
 
 
+@dataclasses.dataclass(frozen=True)
+class CameraProperties:
+    """ Camera properties parsed from a CameraInfo structure
+
+    Also supports read only dict style access (info['camera_ID'], 'name' in info, keys(), get(),
+    etc.), for compatibility with code written for the dict this replaced.
+    """
+    # Must match the fields below, checked against dataclasses.fields after the class.
+    __slots__ = ('name', 'camera_ID', 'max_height', 'max_width', 'is_color_camera',
+                 'bayer_pattern', 'supported_bins', 'supported_video_format', 'pixel_size',
+                 'has_mechanical_shutter', 'has_ST4_port', 'has_cooler', 'is_USB3_host',
+                 'is_USB3_camera', 'e_per_adu', 'bit_depth', 'is_trigger_camera')
+
+    name: str
+    camera_ID: int
+    max_height: u.Quantity
+    max_width: u.Quantity
+    is_color_camera: bool
+    bayer_pattern: str
+    supported_bins: tuple
+    supported_video_format: tuple
+    pixel_size: u.Quantity
+    has_mechanical_shutter: bool
+    has_ST4_port: bool
+    has_cooler: bool
+    is_USB3_host: bool
+    is_USB3_camera: bool
+    e_per_adu: u.Quantity
+    bit_depth: u.Quantity
+    is_trigger_camera: bool
+
+    def __getitem__(self, key):
+        if key not in _CAMERA_PROPERTY_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in _CAMERA_PROPERTY_NAMES
+
+    def __iter__(self):
+        return iter(_CAMERA_PROPERTY_NAMES)
+
+    def __len__(self):
+        return len(_CAMERA_PROPERTY_NAMES)
+
+    def keys(self):
+        return _CAMERA_PROPERTY_NAMES
+
+    def values(self):
+        return tuple(getattr(self, key) for key in _CAMERA_PROPERTY_NAMES)
+
+    def items(self):
+        return tuple((key, getattr(self, key)) for key in _CAMERA_PROPERTY_NAMES)
+
+    def get(self, key, default=None):
+        if key not in _CAMERA_PROPERTY_NAMES:
+            return default
+        return getattr(self, key)
+
+
+_CAMERA_PROPERTY_NAMES = tuple(field.name for field in dataclasses.fields(CameraProperties))
+assert CameraProperties.__slots__ == _CAMERA_PROPERTY_NAMES, \
+    "CameraProperties.__slots__ doesn't match its fields"
+
+
 class ControlType(enum.IntEnum):
     """ Control types """
     GAIN = 0
@@ -348,6 +746,9 @@ class ControlType(enum.IntEnum):
     AUTO_MAX_BRIGHTNESS = AUTO_TARGET_BRIGHTNESS
 
 
+_CONTROL_TYPE_NAMES = tuple(control_type.name for control_type in ControlType)  # No aliases
+
+
 class ControlCaps(ctypes.Structure):
     """ Structure for caps (limits) on allowable parameter values for each camera control """
     _fields_ = [('name', ctypes.c_char * 64),  # The name of the control, .e.g. Exposure, Gain
@@ -361,6 +762,15 @@ class ControlCaps(ctypes.Structure):
                 ('unused', ctypes.c_char * 32)]
 
 
+# numpy structured dtype with the same layout as ControlCaps, char arrays become byte strings
+_CONTROL_CAPS_DTYPE = np.dtype({
+    'names': [name for name, ctype in ControlCaps._fields_],
+    'formats': ['S{}'.format(ctypes.sizeof(ctype)) if issubclass(ctype, ctypes.Array) else ctype
+                for name, ctype in ControlCaps._fields_],
+    'offsets': [getattr(ControlCaps, name).offset for name, ctype in ControlCaps._fields_],
+    'itemsize': ctypes.sizeof(ControlCaps)})
+
+
 class ExposureStatus(enum.IntEnum):
     """ Exposure status codes """
     IDLE = 0
@@ -376,3 +786,28 @@ class ID(ctypes.Structure):
 class SupportedMode(ctypes.Structure):
     """ Array of supported CameraModes, terminated with CameraMode.END """
     _fields_ = [('modes', ctypes.c_int * 16)]
+
+
+# Argument and return types of the SDK functions used, set on the CDLL function pointers so that
+# ctypes uses typed conversions instead of guessing from the Python argument types on each call.
+_FUNCTION_SIGNATURES = {
+    'ASIGetNumOfConnectedCameras': ([], ctypes.c_int),
+    'ASIGetCameraProperty': ([ctypes.POINTER(CameraInfo), ctypes.c_int], ctypes.c_int),
+    'ASIOpenCamera': ([ctypes.c_int], ctypes.c_int),
+    'ASIInitCamera': ([ctypes.c_int], ctypes.c_int),
+    'ASIGetNumOfControls': ([ctypes.c_int, ctypes.POINTER(ctypes.c_int)], ctypes.c_int),
+    'ASIGetControlCaps': ([ctypes.c_int, ctypes.c_int, ctypes.POINTER(ControlCaps)], ctypes.c_int),
+    'ASIGetControlValue': ([ctypes.c_int,
+                            ctypes.c_int,
+                            ctypes.POINTER(ctypes.c_long),
+                            ctypes.POINTER(ctypes.c_int)], ctypes.c_int),
+    'ASISetControlValue': ([ctypes.c_int, ctypes.c_int, ctypes.c_long, ctypes.c_int], ctypes.c_int),
+    'ASIGetROIFormat': ([ctypes.c_int,
+                         ctypes.POINTER(ctypes.c_int),
+                         ctypes.POINTER(ctypes.c_int),
+                         ctypes.POINTER(ctypes.c_int),
+                         ctypes.POINTER(ctypes.c_int)], ctypes.c_int),
+    'ASIStartVideoCapture': ([ctypes.c_int], ctypes.c_int),
+    'ASIStopVideoCapture': ([ctypes.c_int], ctypes.c_int),
+    'ASIGetVideoData': ([ctypes.c_int, ctypes.c_void_p, ctypes.c_long, ctypes.c_int], ctypes.c_int),
+    'ASIGetDroppedFrames': ([ctypes.c_int, ctypes.POINTER(ctypes.c_int)], ctypes.c_int)}